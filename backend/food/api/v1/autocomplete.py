@@ -0,0 +1,24 @@
+from bisect import bisect_left, bisect_right
+
+from food.settings import INGREDIENT_SEARCH_LIMIT
+
+
+class IngredientIndex:
+    """
+    Serialized ingredients sorted by casefolded product name.
+    Prefix lookup is two bisects, exact matches come first.
+    Built for every ingredient snapshot, see api.v1.reference
+    """
+
+    def __init__(self, ingredients):
+        self.rows = sorted(
+            ingredients,
+            key=lambda row: (row['name'].casefold(), row['measurement_unit']),
+        )
+        self.keys = [row['name'].casefold() for row in self.rows]
+
+    def search(self, prefix, limit=INGREDIENT_SEARCH_LIMIT):
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_right(self.keys, prefix + chr(0x10FFFF))
+        return self.rows[start:min(end, start + limit)]
@@ -0,0 +1,93 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from food.settings import RESPONSE_CACHE_TIMEOUT
+
+GENERATION_KEY = 'response:generation'
+
+
+def get_generation():
+    """
+    Generation is the time (ns) of the last content change. It is part
+    of every response key and serves as Last-Modified at the same time
+    """
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def bump_generation():
+    """Makes all cached responses stale, see recipe.signals"""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+class AnonymousCacheMixin:
+    """
+    Caches rendered list/retrieve responses for anonymous users: their
+    responses don't depend on the user. Adds ETag and Last-Modified
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        generation = get_generation()
+        last_modified = generation // 10**9
+        params = urlencode(
+            sorted(
+                (name, sorted(values))
+                for name, values in request.query_params.lists()
+            ),
+            doseq=True,
+        )
+        signature = hashlib.sha1(
+            f'{request.get_host()}{request.path}?{params}:'
+            f'{request.accepted_media_type}'.encode()
+        ).hexdigest()
+        etag = f'"{generation}-{signature}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            key = f'response:{generation}:{signature}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if isinstance(response, Response):
+                    response.accepted_renderer = request.accepted_renderer
+                    response.accepted_media_type = (
+                        request.accepted_media_type
+                    )
+                    response.renderer_context = self.get_renderer_context()
+                    response.render()
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    RESPONSE_CACHE_TIMEOUT,
+                )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
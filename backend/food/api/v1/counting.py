@@ -0,0 +1,53 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import connections
+
+
+class ExactCount:
+    """Plain COUNT(*). Strategies return (count, is_exact)"""
+
+    def count(self, queryset):
+        return queryset.count(), True
+
+
+class CachedCount(ExactCount):
+    """COUNT(*) cached for a short time per filter signature (SQL)"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def count(self, queryset):
+        signature = hashlib.sha1(str(queryset.query).encode()).hexdigest()
+        key = f'count:{signature}'
+        count = cache.get(key)
+        if count is not None:
+            return count, False
+        count, is_exact = super().count(queryset)
+        cache.set(key, count, self.timeout)
+        return count, is_exact
+
+
+class EstimatedCount(CachedCount):
+    """
+    Planner estimate (pg_class.reltuples) for unfiltered lists on
+    Postgres. Small tables and filtered lists fall back to cached count
+    """
+
+    def __init__(self, timeout=30, threshold=10_000):
+        super().__init__(timeout)
+        self.threshold = threshold
+
+    def count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] >= self.threshold:
+                return row[0], False
+        return super().count(queryset)
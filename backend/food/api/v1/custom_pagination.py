@@ -1,10 +1,215 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.core.paginator import (
+    EmptyPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from api.v1.counting import ExactCount
 
 DEFAULT_PAGE_SIZE = api_settings.PAGE_SIZE
 
 
+class CountingPage(Page):
+    """Knows if there is a next page from the rows, not from the count"""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = has_next
+
+    def has_next(self):
+        return self.next_exists
+
+
+class CountingPaginator(Paginator):
+    """
+    Takes count from view's count_strategy (see api.v1.counting).
+    The count is only reported: pages are cut by offset and one extra
+    row, so a cached or estimated count never hides rows
+    """
+
+    def __init__(self, *args, count_strategy, **kwargs):
+        self.count_strategy = count_strategy
+        self.count_exact = True
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = self.count_strategy.count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        """Format only: the last page is known once its rows are read"""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+        if not has_next:
+            # last page: the total is known without counting
+            self.count = bottom + len(rows)
+            self.count_exact = True
+        elif self.count <= bottom + self.per_page:
+            self.count = bottom + self.per_page + 1
+            self.count_exact = False
+        return CountingPage(rows, number, self, has_next)
+
+
 class PageLimitPagination(PageNumberPagination):
     """Only page and limit parameters"""
 
     page_size_query_param = 'limit'
+    count_strategy = ExactCount()
+
+    def django_paginator_class(self, *args, **kwargs):
+        return CountingPaginator(
+            *args, count_strategy=self.count_strategy, **kwargs
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_strategy = getattr(
+            view, 'count_strategy', self.count_strategy
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ('count', self.page.paginator.count),
+                    ('count_exact', self.page.paginator.count_exact),
+                    ('next', self.get_next_link()),
+                    ('previous', self.get_previous_link()),
+                    ('results', data),
+                ]
+            )
+        )
+
+
+class PageLimitCursorPagination(PageLimitPagination):
+    """
+    Page and limit by default. Any ?cursor= (even empty) switches to
+    keyset pagination over view.cursor_fields, e.g. ('pub_date', 'id'),
+    newest first: no COUNT(*) and no OFFSET, so deep pages stay fast
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+    keyset_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_fields = getattr(view, 'cursor_fields', None)
+        self.cursor_mode = cursor_fields is not None and (
+            self.keyset_only
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        date_field, id_field = cursor_fields
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{date_field}', f'-{id_field}')
+        position = self.decode_cursor(request)
+        if position is not None:
+            date, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__lt': date})
+                | Q(**{date_field: date, f'{id_field}__lt': pk})
+            )
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (
+                getattr(page[-1], date_field),
+                getattr(page[-1], id_field),
+            )
+        return page
+
+    def paginate_known_page(self, queryset, request, view, next_position):
+        """
+        Page cut elsewhere (e.g. from a precomputed feed): queryset holds
+        exactly its rows, next_position is where the next page starts
+        """
+        self.cursor_mode = True
+        self.request = request
+        self.next_position = next_position
+        date_field, id_field = view.cursor_fields
+        return list(queryset.order_by(f'-{date_field}', f'-{id_field}'))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            date, pk = (
+                base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            )
+            date, pk = parse_datetime(date), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk
+
+    def encode_cursor(self, position):
+        date, pk = position
+        return base64.urlsafe_b64encode(
+            f'{date.isoformat()}|{pk}'.encode()
+        ).decode()
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ('next', self.get_next_link()),
+                    ('previous', None),
+                    ('results', data),
+                ]
+            )
+        )
+
+
+class KeysetPagination(PageLimitCursorPagination):
+    """Keyset pagination only, first page is the one without ?cursor="""
+
+    keyset_only = True
@@ -0,0 +1,108 @@
+from bisect import bisect_left, insort
+from itertools import islice
+
+from django.core.cache import cache
+
+from food.settings import (
+    FEED_CACHE_MIN_FOLLOWING,
+    FEED_CACHE_SIZE,
+    FEED_CACHE_TIMEOUT,
+)
+from recipe.models import Recipe
+from users.models import Follow
+
+# followers' feeds are read and written by this many keys at once
+FAN_OUT_CHUNK = 500
+
+
+def feed_key(user_id):
+    return f'feed:{user_id}'
+
+
+def followed_recipes(queryset, user):
+    """Fan-out on read: recipes of every author the user follows"""
+    return queryset.filter(
+        author__in=Follow.objects.filter(user=user).values('author')
+    )
+
+
+def build_feed(user):
+    """
+    Newest (pub_date, id) entries of the feed, oldest first, so they
+    can be searched with bisect. complete: the whole feed fits in
+    """
+    entries = list(
+        followed_recipes(Recipe.objects.all(), user)
+        .order_by('-pub_date', '-id')
+        .values_list('pub_date', 'id')[:FEED_CACHE_SIZE]
+    )
+    entries.reverse()
+    feed = {'entries': entries, 'complete': len(entries) < FEED_CACHE_SIZE}
+    cache.set(feed_key(user.id), feed, FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def get_cached_page(user, position, size):
+    """
+    Ids of size feed recipes older than position and the position the
+    next page starts after (None on the last page), both taken from the
+    precomputed feed. None: user follows few authors or page is beyond
+    the cache
+    """
+    feed = cache.get(feed_key(user.id))
+    if feed is None:
+        if user.following.count() < FEED_CACHE_MIN_FOLLOWING:
+            return None
+        feed = build_feed(user)
+    entries = feed['entries']
+    end = len(entries) if position is None else bisect_left(entries, position)
+    if end < size and not feed['complete']:
+        return None
+    start = max(end - size, 0)
+    ids = [pk for _, pk in entries[start:end]]
+    # not from the rows: recipes deleted meanwhile would end the feed
+    has_next = start > 0 or not feed['complete']
+    return ids, entries[start] if has_next else None
+
+
+def update_follower_feeds(author_id, update):
+    """Applies update(feed) to cached feeds of all author's followers"""
+    followers = (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+        .iterator()
+    )
+    while True:
+        keys = [
+            feed_key(user_id)
+            for user_id in islice(followers, FAN_OUT_CHUNK)
+        ]
+        if not keys:
+            return
+        feeds = cache.get_many(keys)
+        for feed in feeds.values():
+            update(feed)
+        cache.set_many(feeds, FEED_CACHE_TIMEOUT)
+
+
+def add_to_feeds(recipe):
+    entry = (recipe.pub_date, recipe.id)
+
+    def add(feed):
+        entries = feed['entries']
+        if entry not in entries:
+            insort(entries, entry)
+        if len(entries) > FEED_CACHE_SIZE:
+            del entries[:len(entries) - FEED_CACHE_SIZE]
+            feed['complete'] = False
+
+    update_follower_feeds(recipe.author_id, add)
+
+
+def remove_from_feeds(author_id, recipe_id):
+    def remove(feed):
+        feed['entries'] = [
+            entry for entry in feed['entries'] if entry[1] != recipe_id
+        ]
+
+    update_follower_feeds(author_id, remove)
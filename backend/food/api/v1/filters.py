@@ -1,14 +1,21 @@
+from django.db.models import Exists, OuterRef
 from django_filters import CharFilter, FilterSet, MultipleChoiceFilter
 from rest_framework import serializers
 from rest_framework.filters import SearchFilter
 
-from recipe.models import Recipe, Tag
+from api.v1.reference import tag_reference
+from recipe.models import Recipe, RecipeTag
+
+
+def get_tag_choices():
+    """Tag choices from the shared tag snapshot"""
+    return [(row['slug'], row['name']) for row in tag_reference.get().rows]
 
 
 class RecipeFilter(FilterSet):
-    queryset = Tag.objects.all()
-    choices = [(tag.slug, tag.name) for tag in Tag.objects.all()]
-    tags = MultipleChoiceFilter(field_name='tags__slug', choices=choices)
+    tags = MultipleChoiceFilter(
+        choices=get_tag_choices, method='filter_tags', label='Теги'
+    )
     is_favorited = CharFilter(
         method='filter_is_favorited', label='В избранных'
     )
@@ -16,6 +23,16 @@ class RecipeFilter(FilterSet):
         method='filter_is_in_shopping_cart', label='В списке покупок'
     )
 
+    def filter_tags(self, queryset, name, value):
+        """EXISTS subquery: no join, no duplicates, no DISTINCT"""
+        return queryset.filter(
+            Exists(
+                RecipeTag.objects.filter(
+                    recipe=OuterRef('pk'), tag__slug__in=value
+                )
+            )
+        )
+
     def filter_is_favorited(self, queryset, name, value):
         is_favorited = int(value)
         cur_user = self.request.user
@@ -0,0 +1,128 @@
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+class ShoppingListLayout:
+    """
+    Flows shopping list lines across as many pages as needed.
+    Lines are drawn in columns (name / amount / unit) and grouped
+    by the first letter of the product name. Items are consumed one
+    by one, so the list itself is never held in memory
+    """
+
+    title = 'Что нужно купить: '
+    continued = 'Что нужно купить (продолжение): '
+
+    def __init__(
+        self,
+        canvas,
+        pagesize=A4,
+        logo=None,
+        font='Dejavu',
+        font_size=12,
+        leading=15,
+        margin=20 * mm,
+    ):
+        self.canvas = canvas
+        self.width, self.height = pagesize
+        self.logo = logo
+        self.font = font
+        self.font_size = font_size
+        self.leading = leading
+        self.margin = margin
+        self.name_x = margin
+        self.amount_x = self.width - margin - 40 * mm  # right aligned
+        self.gap = 3 * mm
+        self.unit_x = self.amount_x + self.gap
+        self.page_number = 0
+        self.y = 0
+
+    def render(self, items):
+        self._start_page()
+        letter = None
+        for item in items:
+            first_letter = item.name[:1].upper()
+            if first_letter != letter:
+                letter = first_letter
+                # group heading is never left alone at the bottom of a page
+                self._reserve(2 * self.leading)
+                self._draw_letter(letter)
+            self._reserve(self.leading)
+            self._draw_item(item)
+        self._finish_page()
+
+    def _reserve(self, height):
+        if self.y - height < self.margin + self.leading:
+            self._finish_page()
+            self._start_page()
+
+    def _start_page(self):
+        self.page_number += 1
+        self.canvas.setPageSize((self.width, self.height))
+        self.y = self.height - self.margin
+        if self.page_number == 1:
+            self._draw_logo()
+            self._draw_title(self.title)
+        else:
+            self._draw_title(self.continued)
+        self.canvas.setFont(self.font, self.font_size)
+
+    def _finish_page(self):
+        self.canvas.setFont(self.font, self.font_size - 2)
+        self.canvas.drawCentredString(
+            self.width / 2, self.margin / 2, str(self.page_number)
+        )
+        self.canvas.showPage()
+
+    def _draw_logo(self):
+        if self.logo is None:
+            return
+        logo_width, logo_height = self.logo.getSize()
+        self.y -= logo_height
+        self.canvas.drawImage(
+            image=self.logo, x=(self.width - logo_width) / 2, y=self.y
+        )
+        self.y -= self.leading
+
+    def _draw_title(self, text):
+        self.canvas.setFont(self.font, self.font_size + 2)
+        self.y -= self.leading
+        self.canvas.drawCentredString(self.width / 2, self.y, text)
+        self.y -= self.leading
+
+    def _draw_letter(self, letter):
+        self.canvas.setFont(self.font, self.font_size + 2)
+        self.y -= self.leading
+        self.canvas.drawString(self.name_x, self.y, letter)
+        self.canvas.setFont(self.font, self.font_size)
+
+    def _width(self, text):
+        return stringWidth(text, self.font, self.font_size)
+
+    def _fit(self, text, width):
+        """Text cut with an ellipsis so it is not wider than width"""
+        if self._width(text) <= width:
+            return text
+        while text and self._width(text + '…') > width:
+            text = text[:-1]
+        return text.rstrip() + '…'
+
+    def _draw_item(self, item):
+        self.y -= self.leading
+        amount = str(item.amount)
+        name_width = (
+            self.amount_x - self._width(amount) - self.gap - self.name_x
+        )
+        self.canvas.drawString(
+            self.name_x, self.y, self._fit(item.name, name_width)
+        )
+        self.canvas.drawRightString(self.amount_x, self.y, amount)
+        self.canvas.drawString(
+            self.unit_x,
+            self.y,
+            self._fit(
+                item.measurement_unit,
+                self.width - self.margin - self.unit_x,
+            ),
+        )
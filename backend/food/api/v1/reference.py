@@ -0,0 +1,131 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.v1.autocomplete import IngredientIndex
+from recipe.models import Ingredient, Tag
+
+# how often a worker compares its snapshot with the shared version stamp
+VERSION_CHECK_INTERVAL = 1
+# rows may change without signals (bulk_create, raw SQL, other app):
+# snapshots are reloaded from the database at least this often
+SNAPSHOT_MAX_AGE = 60
+
+
+class Snapshot:
+    """Serialized rows, rows by id and the same rows as JSON bytes"""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.by_id = {int(row['id']): row for row in rows}
+        self.content = JSONRenderer().render(rows)
+        self.loaded = time.monotonic()
+
+
+class IngredientSnapshot(Snapshot):
+    def __init__(self, version, rows):
+        super().__init__(version, rows)
+        self.index = IngredientIndex(rows)
+
+
+class ReferenceData:
+    """
+    Nearly static reference data in two layers: L1 is a snapshot in
+    process memory, L2 is the shared Django cache. Every worker checks
+    the version stamp in L2 at most once a VERSION_CHECK_INTERVAL, so
+    bump() from signals reaches all of them. Both layers also expire
+    after SNAPSHOT_MAX_AGE
+    """
+
+    def __init__(self, name, load, snapshot_class=Snapshot):
+        self.name = name
+        self.load = load
+        self.snapshot_class = snapshot_class
+        self.version_key = f'reference:{name}:version'
+        self.snapshot = None
+        self.checked = 0
+
+    def get(self):
+        now = time.monotonic()
+        snapshot = self.snapshot
+        if (
+            snapshot is not None
+            and now - self.checked < VERSION_CHECK_INTERVAL
+            and now - snapshot.loaded < SNAPSHOT_MAX_AGE
+        ):
+            return snapshot
+        version = cache.get_or_set(self.version_key, time.time_ns, None)
+        if (
+            snapshot is None
+            or snapshot.version != version
+            or now - snapshot.loaded >= SNAPSHOT_MAX_AGE
+        ):
+            key = f'reference:{self.name}:{version}'
+            rows = cache.get(key)
+            if rows is None:
+                rows = self.load()
+                cache.set(key, rows, SNAPSHOT_MAX_AGE)
+            self.snapshot = self.snapshot_class(version, rows)
+        self.checked = now
+        return self.snapshot
+
+    def lookup(self, ids):
+        """
+        Rows by id. Ids missing in the snapshot are checked in the
+        database: the row may be newer than the snapshot
+        """
+        by_id = self.get().by_id
+        found = {pk: by_id[pk] for pk in ids if pk in by_id}
+        missing = ids - found.keys()
+        if missing:
+            found.update(
+                (int(row['id']), row) for row in self.load(ids=missing)
+            )
+        return found
+
+    def bump(self):
+        cache.set(self.version_key, time.time_ns(), None)
+        self.snapshot = None
+
+
+def snapshot_response(request, snapshot):
+    """Pre-serialized bytes for JSON, regular Response for other formats"""
+    if request.accepted_renderer.format == 'json':
+        return HttpResponse(snapshot.content, content_type='application/json')
+    return Response(snapshot.rows)
+
+
+def load_tags(ids=None):
+    tags = Tag.objects.all() if ids is None else Tag.objects.filter(id__in=ids)
+    return list(tags.values('id', 'name', 'color', 'slug'))
+
+
+def load_ingredients(ids=None):
+    """Same shape as IngredientSerializer output (id is a string there)"""
+    ingredients = Ingredient.objects.all()
+    if ids is not None:
+        ingredients = ingredients.filter(id__in=ids)
+    ingredients = ingredients.values(
+        'id',
+        name=F('product__name'),
+        unit=F('measurement_unit__name'),
+    )
+    return [
+        {
+            'id': str(row['id']),
+            'name': row['name'],
+            'measurement_unit': row['unit'],
+        }
+        for row in ingredients
+    ]
+
+
+tag_reference = ReferenceData('tags', load_tags)
+ingredient_reference = ReferenceData(
+    'ingredients', load_ingredients, IngredientSnapshot
+)
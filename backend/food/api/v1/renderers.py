@@ -0,0 +1,35 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ShoppingListRenderer(JSONRenderer):
+    """
+    Makes ?format= choose shopping list export. The view returns
+    ready file; errors are switched to JSONRenderer by the view
+    """
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class TextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+
+# pdf goes first, so it stays default for the frontend
+SHOPPING_LIST_RENDERERS = (
+    PDFRenderer,
+    CSVRenderer,
+    TextRenderer,
+    JSONRenderer,
+)
@@ -1,47 +1,129 @@
+import csv
+import hashlib
+import io
+import json
 import os
-import uuid
+from typing import NamedTuple
 
+from django.core.cache import cache
+from django.db.models import Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics, ttfonts
 from reportlab.pdfgen import canvas
 
-from food.settings import MEDIA_ROOT
-from recipe.models import Ingredient, Recipe, RecipeIngredient
-
-
-def get_ingredients(recipes_id):
-    """Gets all ingredients for recipes and returns ingredients dictionary"""
-    ingredients_dict = {}
-    for rec_id in recipes_id:
-        recipe = Recipe.objects.get(id=rec_id)
-        ingredients = recipe.ingreds.all().values_list('ingredient', flat=True)
-        for ing_id in ingredients:
-            ingredient = Ingredient.objects.get(id=ing_id)
-            amount = RecipeIngredient.objects.get(
-                recipe=recipe, ingredient=ingredient
-            ).amount
-            ingredients_dict[str(ingredient)] = amount + ingredients_dict.get(
-                str(ingredient), 0
-            )
-    return ingredients_dict
-
-
-def create_pdf(ingredients):
-    """Returns pdf with recipes"""
-    filename = f'{str(uuid.uuid4())}.pdf'
-    file_path = os.path.join(MEDIA_ROOT, 'pdf', filename)
-    logo_path = os.path.join(MEDIA_ROOT, 'logo.jpg')
-    p = canvas.Canvas(filename=file_path)
-    p.drawImage(image=logo_path, x=195, y=500)
-    pdfmetrics.registerFont(ttfonts.TTFont('Dejavu', 'DejaVuSans.ttf'))
-    p.setFont('Dejavu', 14)
-    p.drawCentredString(300, 478, 'Что нужно купить: ')
-    p.setFont('Dejavu', 12)
-    y = 450
-    for ingredient, amount in ingredients.items():
-        p.drawCentredString(
-            x=300, y=y, text=f'{ingredient} {amount}'
-        )  # что если не хватает страницы?
-        y -= 15
-    p.showPage()
+from api.v1.pdf_layout import ShoppingListLayout
+from food.settings import MEDIA_ROOT, SHOPPING_LIST_CACHE_TIMEOUT
+from recipe.models import RecipeIngredient
+
+# registered once per process, not on every download
+pdfmetrics.registerFont(ttfonts.TTFont('Dejavu', 'DejaVuSans.ttf'))
+LOGO = ImageReader(os.path.join(MEDIA_ROOT, 'logo.jpg'))
+
+
+class ShoppingItem(NamedTuple):
+    """One line of the shopping list"""
+
+    name: str
+    measurement_unit: str
+    amount: int
+
+    def __str__(self):
+        return f'{self.name} ({self.measurement_unit}) : {self.amount}'
+
+
+def get_ingredients(user):
+    """
+    Sums up ingredients of all recipes in user's cart in one query.
+    Returns iterator of ShoppingItem ordered by product name
+    """
+    rows = (
+        RecipeIngredient.objects.filter(recipe__cart__user=user)
+        .values_list(
+            'ingredient__product__name', 'ingredient__measurement_unit__name'
+        )
+        .annotate(total=Sum('amount'))
+        .order_by(
+            'ingredient__product__name', 'ingredient__measurement_unit__name'
+        )
+    )
+    return (ShoppingItem(*row) for row in rows.iterator())
+
+
+def create_pdf(ingredients, pagesize=A4):
+    """Returns in-memory pdf with ingredients to buy"""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=pagesize)
+    ShoppingListLayout(p, pagesize=pagesize, logo=LOGO).render(ingredients)
     p.save()
-    return file_path, filename
+    buffer.seek(0)
+    return buffer
+
+
+def get_cart_hash(user):
+    """
+    Hash of cart contents: recipe ids and their last modification time.
+    Returns None for empty cart
+    """
+    cart = user.cart.order_by('recipe_id').values_list(
+        'recipe_id', 'recipe__updated'
+    )
+    digest = hashlib.sha256()
+    is_empty = True
+    for recipe_id, updated in cart:
+        digest.update(f'{recipe_id}:{updated.isoformat()};'.encode())
+        is_empty = False
+    if is_empty:
+        return None
+    return digest.hexdigest()
+
+
+class Echo:
+    """File-like object for csv.writer that just returns written line"""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(ingredients):
+    yield 'Что нужно купить:\n'
+    for item in ingredients:
+        yield f'{item}\n'
+
+
+def export_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ShoppingItem._fields)
+    for item in ingredients:
+        yield writer.writerow(item)
+
+
+def export_json(ingredients):
+    yield '['
+    separator = ''
+    for item in ingredients:
+        yield separator + json.dumps(item._asdict(), ensure_ascii=False)
+        separator = ', '
+    yield ']'
+
+
+STREAMED_EXPORTS = {
+    'txt': export_txt,
+    'csv': export_csv,
+    'json': export_json,
+}
+
+
+def get_shopping_list(user, cart_hash, export_format='pdf'):
+    """
+    Returns shopping list as iterable of chunks. Text formats are
+    streamed, pdf is rendered once per cart contents and cached
+    """
+    if export_format in STREAMED_EXPORTS:
+        return STREAMED_EXPORTS[export_format](get_ingredients(user))
+    key = f'shopping_list:pdf:{cart_hash}'
+    document = cache.get(key)
+    if document is None:
+        document = create_pdf(get_ingredients(user)).getvalue()
+        cache.set(key, document, SHOPPING_LIST_CACHE_TIMEOUT)
+    return (document,)
@@ -1,5 +1,6 @@
 from django.urls import include, path
 
+from jobs.urls import jobs_urlpatterns
 from recipe.urls import recipe_urlpatterns
 from users.urls import users_urlpatterns
 
@@ -8,5 +9,6 @@ app_name = 'v1'
 urlpatterns = [
     path(r'', include(users_urlpatterns)),
     path(r'', include(recipe_urlpatterns)),
+    path(r'', include(jobs_urlpatterns)),
     path(r'', include('djoser.urls')),
 ]
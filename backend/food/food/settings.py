@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'recipe.apps.RecipeConfig',
+    'jobs.apps.JobsConfig',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -77,6 +79,57 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        # locmem for a single process, memcached (see infra) or any
+        # backend every web and worker process can reach
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+# locmem is per process: nothing cached there reaches other processes
+CACHE_IS_LOCAL = CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', default=60 * 60)
+)
+
+INGREDIENT_SEARCH_LIMIT = int(
+    os.getenv('INGREDIENT_SEARCH_LIMIT', default=20)
+)
+
+# anonymous GET responses, dropped earlier on any recipe/tag/user change
+RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RESPONSE_CACHE_TIMEOUT', default=10 * 60)
+)
+
+# /recipes/feed/: users following at least FEED_CACHE_MIN_FOLLOWING
+# authors get newest FEED_CACHE_SIZE feed entries precomputed
+FEED_CACHE_MIN_FOLLOWING = int(
+    os.getenv('FEED_CACHE_MIN_FOLLOWING', default=50)
+)
+FEED_CACHE_SIZE = int(os.getenv('FEED_CACHE_SIZE', default=500))
+FEED_CACHE_TIMEOUT = int(
+    os.getenv('FEED_CACHE_TIMEOUT', default=24 * 60 * 60)
+)
+
+# False: jobs run right away in the web process, no run_worker needed
+JOBS_ASYNC = os.getenv('JOBS_ASYNC', default='False') == 'True'
+if JOBS_ASYNC and CACHE_IS_LOCAL:
+    # the worker would update feeds and drop cached responses
+    # in its own memory only
+    raise ImproperlyConfigured(
+        'JOBS_ASYNC=True requires CACHE_BACKEND shared with run_worker'
+    )
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', default=3))
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', default=10 * 60))
+JOB_MAX_WAIT = int(os.getenv('JOB_MAX_WAIT', default=30))
+# finished jobs and their files are deleted after that
+JOB_KEEP_HOURS = int(os.getenv('JOB_KEEP_HOURS', default=24))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,6 +166,9 @@ MEDIA_URL = '/backend/media/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MAX_IMAGE_SIZE = int(os.getenv('MAX_IMAGE_SIZE', default=10 * 2**20))
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', default=25_000_000))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -122,7 +178,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.v1.custom_pagination.PageLimitPagination',
     'PAGE_SIZE': 5,
@@ -142,3 +198,17 @@ DJOSER = {
 }
 
 AUTH_USER_MODEL = 'users.User'
+
+# per-process LRU of authenticated tokens, seconds and entries
+AUTH_TOKEN_CACHE_TIMEOUT = int(
+    os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', default=10)
+)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', default=1024))
+# shared (CACHE_BACKEND) layer, 0 turns it off. Off by default with
+# locmem: revoked tokens would stay valid in other processes that long
+AUTH_TOKEN_SHARED_CACHE_TIMEOUT = int(
+    os.getenv(
+        'AUTH_TOKEN_SHARED_CACHE_TIMEOUT',
+        default=0 if CACHE_IS_LOCAL else 5 * 60,
+    )
+)
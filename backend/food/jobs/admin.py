@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'created', 'finished')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,75 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from food.settings import JOB_KEEP_HOURS
+from jobs.services import (
+    PURGE_INTERVAL,
+    claim_next,
+    execute,
+    purge_finished,
+    requeue_stale,
+)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из таблицы Job'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2, help='Размер пула'
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Пул процессов вместо пула потоков',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0, help='Пауза при пустой очереди'
+        )
+        parser.add_argument(
+            '--keep-hours',
+            type=int,
+            default=JOB_KEEP_HOURS,
+            help='Сколько хранить завершённые задачи и их файлы',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить накопившиеся задачи и выйти',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if options['processes']:
+            connections.close_all()  # not to be shared with children
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        requeue_stale()
+        running = set()
+        purged = 0
+        self.stdout.write(f'Воркер запущен, пул: {workers}')
+        with pool:
+            while True:
+                running = {future for future in running if not future.done()}
+                job = claim_next() if len(running) < workers else None
+                if job is not None:
+                    running.add(pool.submit(execute, job.id))
+                    continue
+                if options['once'] and not running:
+                    break
+                if time.monotonic() - purged > PURGE_INTERVAL:
+                    purge_finished(timedelta(hours=options['keep_hours']))
+                    requeue_stale()
+                    purged = time.monotonic()
+                time.sleep(options['poll'])
@@ -0,0 +1,66 @@
+from django.db import models
+
+from users.models import User
+
+
+class Job(models.Model):
+    """Task waiting for (or processed by) manage.py run_worker"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = [
+        (PENDING, PENDING),
+        (RUNNING, RUNNING),
+        (DONE, DONE),
+        (FAILED, FAILED),
+    ]
+
+    name = models.CharField(verbose_name='Задача', max_length=200)
+    args = models.JSONField(verbose_name='Аргументы', default=list)
+    key = models.CharField(
+        verbose_name='Ключ для повторных запросов',
+        max_length=200,
+        blank=True,
+        db_index=True,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        verbose_name='Пользователь',
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=20,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток', default=0
+    )
+    result = models.JSONField(verbose_name='Результат', null=True, blank=True)
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Дата создания', auto_now_add=True
+    )
+    started = models.DateTimeField(
+        verbose_name='Дата запуска', null=True, blank=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'created'], name='job_queue_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,8 @@
+TASKS = {}
+
+
+def task(func):
+    """Registers function as a job, jobs refer to it by name"""
+    TASKS[f'{func.__module__}.{func.__name__}'] = func
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    return func
@@ -0,0 +1,25 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from jobs.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'url', 'created', 'finished')
+
+    def get_url(self, obj):
+        """Link to the result file, when job produced one"""
+        if obj.status != Job.DONE or not isinstance(obj.result, dict):
+            return None
+        name = obj.result.get('file')
+        if not name:
+            return None
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,118 @@
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from food.settings import (
+    JOB_KEEP_HOURS,
+    JOB_MAX_ATTEMPTS,
+    JOB_TIMEOUT,
+    JOBS_ASYNC,
+)
+from jobs.models import Job
+from jobs.registry import TASKS
+
+PURGE_INTERVAL = 60 * 60
+_purged = {'at': 0}
+
+
+def enqueue(func, *args, user=None, key=''):
+    """
+    Puts registered task into the queue. Unfinished or done job with
+    the same key is returned instead of a new one. Without JOBS_ASYNC
+    the job runs right away in the current process, is not retried and
+    is stored only if it has a key (its result may be asked for later)
+    """
+    if key:
+        job = (
+            Job.objects.filter(key=key)
+            .exclude(status=Job.FAILED)
+            .order_by('-created')
+            .first()
+        )
+        if job is not None:
+            return job
+    job = Job(name=func.task_name, args=list(args), user=user, key=key)
+    if not JOBS_ASYNC and not key:
+        return run_job(job, retry=False, save=False)
+    job.save()
+    if not JOBS_ASYNC:
+        purge_if_due()  # no run_worker to do it
+        run_job(job, retry=False)
+    return job
+
+
+def claim_next():
+    """
+    Marks the oldest pending job as running and returns it.
+    Conditional UPDATE makes it safe for several workers on any database
+    """
+    pending = Job.objects.filter(status=Job.PENDING).order_by('created')
+    for job_id in pending.values_list('id', flat=True)[:10]:
+        claimed = Job.objects.filter(id=job_id, status=Job.PENDING).update(
+            status=Job.RUNNING, started=timezone.now()
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job, retry=True, save=True):
+    """Failed job goes back to the queue only if a worker will retry it"""
+    job.status = Job.RUNNING
+    job.attempts += 1
+    try:
+        job.result = TASKS[job.name](*job.args)
+    except Exception:
+        job.error = traceback.format_exc()
+        job.status = (
+            Job.PENDING
+            if retry and job.attempts < JOB_MAX_ATTEMPTS
+            else Job.FAILED
+        )
+    else:
+        job.status = Job.DONE
+        job.error = ''
+    job.finished = timezone.now()
+    if save:
+        job.save()
+    return job
+
+
+def execute(job_id):
+    """Entry point for worker threads and processes"""
+    close_old_connections()
+    try:
+        run_job(Job.objects.get(id=job_id))
+    finally:
+        close_old_connections()
+
+
+def requeue_stale():
+    """Jobs left running by a killed worker go back to the queue"""
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=JOB_TIMEOUT),
+    ).update(status=Job.PENDING)
+
+
+def purge_finished(older_than):
+    """Deletes old finished jobs together with their result files"""
+    jobs = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        finished__lt=timezone.now() - older_than,
+    )
+    for result in jobs.values_list('result', flat=True):
+        if isinstance(result, dict) and result.get('file'):
+            default_storage.delete(result['file'])
+    return jobs.delete()[0]
+
+
+def purge_if_due():
+    """purge_finished at most once a PURGE_INTERVAL per process"""
+    if time.monotonic() - _purged['at'] > PURGE_INTERVAL:
+        _purged['at'] = time.monotonic()
+        purge_finished(timedelta(hours=JOB_KEEP_HOURS))
@@ -0,0 +1,13 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from jobs.views import JobViewSet
+
+app_name = 'jobs'
+
+router_v1 = DefaultRouter()
+router_v1.register(r'jobs', JobViewSet, basename='jobs')
+
+jobs_urlpatterns = [
+    path('', include(router_v1.urls)),
+]
@@ -0,0 +1,37 @@
+import time
+
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from food.settings import JOB_MAX_WAIT
+from jobs.models import Job
+from jobs.serializers import JobSerializer
+
+POLL_INTERVAL = 0.5
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Job status. ?wait=<seconds> holds the request until job finishes"""
+
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = 0
+        wait = min(wait, JOB_MAX_WAIT)
+        deadline = time.monotonic() + wait
+        while (
+            job.status in (Job.PENDING, Job.RUNNING)
+            and time.monotonic() < deadline
+        ):
+            time.sleep(POLL_INTERVAL)
+            job.refresh_from_db(fields=('status', 'result', 'finished'))
+        return Response(self.get_serializer(job).data)
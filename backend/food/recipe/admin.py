@@ -62,7 +62,8 @@ class RecipeAdmin(admin.ModelAdmin):
         'name',
         'text',
         'cooking_time',
-        'fav_counter',
+        'favorites_count',
+        'in_carts_count',
     )
     list_filter = ('author', 'name', 'tags')
     search_fields = (
@@ -73,11 +74,6 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time',
     )
 
-    def fav_counter(self, obj):
-        return obj.favorites.count()
-
-    fav_counter.short_description = 'Добавлен в избранное (раз)'
-
 
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Recipe, RecipeAdmin)
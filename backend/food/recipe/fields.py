@@ -0,0 +1,35 @@
+import uuid
+
+from rest_framework import serializers
+
+from recipe.images import clean_image, decode_base64_image
+
+
+class RenditionImageField(serializers.ImageField):
+    """
+    Returns url of a resized copy of the image instead of the original.
+    Rendition may be overridden by serializer context (see RecipeViewSet)
+    """
+
+    def __init__(self, rendition='card', **kwargs):
+        self.rendition = rendition
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        renditions = getattr(value.instance, 'renditions', None) or {}
+        name = renditions.get(self.context.get('rendition', self.rendition))
+        if name is None:  # not processed yet
+            return super().to_representation(value)
+        url = value.storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class Base64ImageField(RenditionImageField):
+    def to_internal_value(self, data):
+        with decode_base64_image(data) as file:
+            return clean_image(file, name=uuid.uuid4().hex)
@@ -0,0 +1,147 @@
+import binascii
+import io
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from food.settings import MAX_IMAGE_PIXELS, MAX_IMAGE_SIZE
+
+# rendition name: bounding box, image is never upscaled
+RENDITIONS = {
+    'list': (160, 160),
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+RENDITIONS_DIR = 'images/renditions'
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+SAVE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+BASE64_MARKER = ';base64,'
+# multiple of 4, so every chunk decodes on its own
+BASE64_CHUNK = 64 * 1024
+# decoded bytes kept in memory, bigger images go to a temporary file
+SPOOL_SIZE = 2**20
+SIGNATURES = (
+    b'\xff\xd8\xff',  # JPEG
+    b'\x89PNG\r\n\x1a\n',
+    b'GIF87a',
+    b'GIF89a',
+    b'RIFF',  # WEBP
+    b'BM',
+)
+
+
+def validate_image_size(size):
+    if size > MAX_IMAGE_SIZE:
+        raise serializers.ValidationError(
+            f'Размер изображения не должен превышать '
+            f'{MAX_IMAGE_SIZE // 2**20} МБ'
+        )
+
+
+def decode_base64_image(data):
+    """
+    Decodes "data:image/...;base64,..." string chunk by chunk into
+    a spooled temporary file. Size is checked before decoding and the
+    image signature right after the first chunk
+    """
+    start = data.find(BASE64_MARKER, 0, 100) if isinstance(data, str) else -1
+    if start == -1 or not data.startswith('data:image'):
+        raise serializers.ValidationError(
+            'Изображение должно быть строкой вида "data:image/...;base64,..."'
+        )
+    start += len(BASE64_MARKER)
+    validate_image_size((len(data) - start) * 3 // 4)
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    try:
+        for position in range(start, len(data), BASE64_CHUNK):
+            chunk = binascii.a2b_base64(
+                data[position:position + BASE64_CHUNK]
+            )
+            if position == start and not chunk.startswith(SIGNATURES):
+                raise serializers.ValidationError(
+                    'Загрузите корректное изображение'
+                )
+            file.write(chunk)
+    except binascii.Error:
+        file.close()
+        raise serializers.ValidationError('Некорректная строка base64')
+    except serializers.ValidationError:
+        file.close()
+        raise
+    file.seek(0)
+    return file
+
+
+def open_image(file):
+    """Opens image checking its dimensions before pixels are decoded"""
+    try:
+        image = Image.open(file)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise serializers.ValidationError('Загрузите корректное изображение')
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise serializers.ValidationError(
+            f'Изображение слишком большое: {width}x{height} пикселей'
+        )
+    return image
+
+
+def clean_image(file, name):
+    """
+    Returns re-encoded image without metadata (EXIF, GPS etc.).
+    Orientation from EXIF is applied to the pixels first
+    """
+    image = open_image(file)
+    image_format = image.format if image.format in SAVE_FORMATS else 'JPEG'
+    try:
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=JPEG_QUALITY)
+    except OSError:
+        raise serializers.ValidationError('Загрузите корректное изображение')
+    return ContentFile(
+        buffer.getvalue(), name=f'{name}.{SAVE_FORMATS[image_format]}'
+    )
+
+
+def create_renditions(recipe):
+    """
+    Saves card, list and detail copies of recipe image as JPEG and WebP.
+    WebP copy is named <jpeg name>.webp, so nginx can pick it by Accept
+    """
+    storage = recipe.image.storage
+    delete_renditions(recipe)
+    with recipe.image.open('rb') as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original = original.convert('RGB')
+    stem = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    renditions = {}
+    for rendition, size in RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        jpeg = io.BytesIO()
+        image.save(jpeg, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        webp = io.BytesIO()
+        image.save(webp, format='WEBP', quality=WEBP_QUALITY)
+        name = storage.save(
+            f'{RENDITIONS_DIR}/{stem}-{rendition}.jpg',
+            ContentFile(jpeg.getvalue()),
+        )
+        storage.save(f'{name}.webp', ContentFile(webp.getvalue()))
+        renditions[rendition] = name
+    recipe.renditions = renditions
+    recipe.save(update_fields=('renditions',))
+
+
+def delete_renditions(recipe):
+    storage = recipe.image.storage
+    for name in recipe.renditions.values():
+        storage.delete(name)
+        storage.delete(f'{name}.webp')
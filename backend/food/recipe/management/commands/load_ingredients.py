@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.v1.caching import bump_generation
+from api.v1.reference import ingredient_reference
+from recipe.models import Ingredient, Product, Unit
+
+
+def read_csv(path):
+    """Rows like "абрикосовое варенье,г", no header"""
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if len(row) >= 2:
+                yield row[0], row[1]
+
+
+def read_json(path):
+    """List of {"name": ..., "measurement_unit": ...} objects"""
+    with open(path, encoding='utf-8') as file:
+        for row in json.load(file):
+            yield row['name'], row['measurement_unit']
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
+
+class Command(BaseCommand):
+    help = 'Загружает продукты, единицы измерения и ингредиенты из csv/json'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к ingredients.csv или .json')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только .csv и .json файлы')
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        batch_size = options['batch_size']
+
+        start = time.perf_counter()
+        pairs = set()
+        rows = 0
+        for name, unit in reader(path):
+            rows += 1
+            name, unit = name.strip(), unit.strip()
+            if name and unit:
+                pairs.add((name, unit))
+
+        with transaction.atomic():
+            units = self.load_names(
+                Unit, {unit for _, unit in pairs}, batch_size
+            )
+            products = self.load_names(
+                Product, {name for name, _ in pairs}, batch_size
+            )
+            existing = set(
+                Ingredient.objects.values_list(
+                    'product_id', 'measurement_unit_id'
+                )
+            )
+            new_ingredients = [
+                Ingredient(product_id=product_id, measurement_unit_id=unit_id)
+                for product_id, unit_id in {
+                    (products[name], units[unit]) for name, unit in pairs
+                }
+                if (product_id, unit_id) not in existing
+            ]
+            Ingredient.objects.bulk_create(
+                new_ingredients, batch_size=batch_size, ignore_conflicts=True
+            )
+            # bulk_create sends no signals, caches are dropped here
+            transaction.on_commit(ingredient_reference.bump)
+            transaction.on_commit(bump_generation)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Прочитано строк: {rows}, новых ингредиентов: '
+                f'{len(new_ingredients)} за {elapsed:.2f} с '
+                f'({rows / max(elapsed, 1e-6):.0f} строк/с)'
+            )
+        )
+
+    @staticmethod
+    def load_names(model, names, batch_size):
+        """Creates missing rows and returns {name: id} for all of them"""
+        existing = dict(model.objects.values_list('name', 'id'))
+        model.objects.bulk_create(
+            [model(name=name) for name in names if name not in existing],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return dict(model.objects.values_list('name', 'id'))
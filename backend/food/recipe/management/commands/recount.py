@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipe.models import Cart, Favorites, Recipe
+from users.models import Follow, User
+
+
+def count_of(model, field):
+    """Subquery counting model rows pointing to the outer object"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики избранного, покупок, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipes = Recipe.objects.update(
+                favorites_count=count_of(Favorites, 'recipe'),
+                in_carts_count=count_of(Cart, 'recipe'),
+            )
+            users = User.objects.update(
+                recipes_count=count_of(Recipe, 'author'),
+                followers_count=count_of(Follow, 'author'),
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+            )
+        )
@@ -19,7 +19,9 @@ class Unit(models.Model):
 
 
 class Product(models.Model):
-    name = models.CharField(verbose_name='Продукт', unique=True, max_length=50)
+    name = models.CharField(
+        verbose_name='Продукт', unique=True, max_length=200
+    )
 
     class Meta:
         ordering = ('name',)
@@ -48,6 +50,12 @@ class Ingredient(models.Model):
         ordering = ('product__name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'measurement_unit'],
+                name='unique_ingredient',
+            )
+        ]
 
     def __str__(self):
         return f'{self.product} ({self.measurement_unit}) : '
@@ -84,7 +92,7 @@ class Recipe(models.Model):
         on_delete=models.CASCADE,
         related_name='recipes',
         verbose_name='Автор',
-        db_index=True,
+        db_index=False,  # leading column of recipe_author_pub_date_idx
     )
     name = models.CharField(
         verbose_name='Название',
@@ -97,6 +105,12 @@ class Recipe(models.Model):
         help_text='Добавьте изображение блюда',
         upload_to='images',
     )
+    renditions = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание', help_text='Опишите рецепт'
     )
@@ -115,11 +129,37 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    # kept up to date by recipe.signals, repaired by manage.py recount
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном', default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок', default=0, editable=False
+    )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            # default ordering and keyset pagination
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+            # ?author= filter, subscriptions and feed
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx',
+            ),
+            # validate_recipe_name
+            models.Index(
+                fields=['author', 'name'], name='recipe_author_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -134,9 +174,14 @@ class RecipeTag(models.Model):
     )
 
     class Meta:
-        ordering = ('recipe__name',)
         verbose_name = 'Теги рецептов'
         verbose_name_plural = 'Теги рецептов'
+        indexes = [
+            # ?tags= filter, EXISTS by tag for each recipe
+            models.Index(
+                fields=['tag', 'recipe'], name='recipetag_tag_recipe_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipe} помечен тегом {self.tag}'
@@ -148,6 +193,7 @@ class RecipeIngredient(models.Model):
         verbose_name='Рецепт',
         related_name='ingreds',
         on_delete=models.CASCADE,
+        db_index=False,  # leading column of unique_recipe_ingredient
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -160,9 +206,15 @@ class RecipeIngredient(models.Model):
     )
 
     class Meta:
-        ordering = ('recipe__name',)
+        ordering = ('id',)
         verbose_name = 'Ингредиенты рецептов'
         verbose_name_plural = 'Ингредиенты рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'ingredient'],
+                name='unique_recipe_ingredient',
+            )
+        ]
 
     def __str__(self):
         return f'Для {self.recipe} нужны: {self.ingredient} {self.amount}'
@@ -183,7 +235,6 @@ class Favorites(models.Model):  # here to avoid circular import
     )
 
     class Meta:
-        ordering = ('user', 'pub_date')
         verbose_name = 'Избранные рецепты'
         verbose_name_plural = 'Избранные рецепты'
         constraints = [
@@ -211,7 +262,6 @@ class Cart(models.Model):  # here to avoid circular import
     )
 
     class Meta:
-        ordering = ('user', 'pub_date')
         verbose_name = 'Покупка'
         verbose_name_plural = 'Покупки'
         constraints = [
@@ -1,8 +1,10 @@
-import base64
-
-from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from api.v1.reference import ingredient_reference, tag_reference
+from jobs.services import enqueue
+from recipe.fields import Base64ImageField, RenditionImageField
 from recipe.models import (
     Cart,
     Favorites,
@@ -12,22 +14,26 @@ from recipe.models import (
     RecipeTag,
     Tag,
 )
+from recipe.tasks import create_recipe_renditions
 from recipe.validators import (
     is_unique,
     validate_ingredients,
     validate_ingredient_id,
+    validate_ingredient_ids,
     validate_recipe_name,
     validate_tags,
 )
 from users.serializers import AuthorSerializer
 
-
-class Base64ImageField(serializers.ImageField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-        return ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+RECIPE_PREFETCH = (
+    'tags',
+    Prefetch(
+        'ingreds',
+        queryset=RecipeIngredient.objects.select_related(
+            'ingredient__product', 'ingredient__measurement_unit'
+        ),
+    ),
+)
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -36,28 +42,28 @@ class IngredientSerializer(serializers.ModelSerializer):
     measurement_unit = serializers.SlugRelatedField(
         slug_field='name', read_only=True
     )
-    amount = serializers.IntegerField(required=True, min_value=1)
+    amount = serializers.IntegerField(
+        required=True, min_value=1, write_only=True
+    )
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
-    def validate_id(self, value):
-        validate_ingredient_id(value, Ingredient)
-        return value
 
-    def to_representation(self, instance):
-        if self.context.get('view').basename == 'ingredients':
-            if self.fields.get('amount'):
-                del self.fields['amount']
-            return super().to_representation(instance)
-
-        recipe = self.context.get('instance')
-        amount = RecipeIngredient.objects.filter(
-            ingredient=instance, recipe=recipe
-        )[0].amount
-        instance.amount = amount
-        return super().to_representation(instance)
+class RecipeIngredientSerializer(serializers.ModelSerializer):
+    """Read-only ingredients of a recipe with their amounts"""
+
+    id = serializers.CharField(source='ingredient_id')
+    name = serializers.CharField(source='ingredient.product.name')
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit.name'
+    )
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+        read_only_fields = fields
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -66,18 +72,13 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'color', 'slug')
 
     def to_internal_value(self, data):
-        if not isinstance(data, dict):
-            tag = {}
-            cur_tag = validate_tags(data, Tag)
-            tag['id'] = cur_tag.id
-            tag['name'] = cur_tag.name
-            tag['color'] = cur_tag.color
-            tag['slug'] = cur_tag.slug
-            return tag
+        """Tags are resolved in RecipeSerializer.to_internal_value"""
         return data
 
 
 class RecipeSubscribeSerializer(serializers.ModelSerializer):
+    image = RenditionImageField(rendition='list', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -90,7 +91,9 @@ class RecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField(required=True)
     tags = TagSerializer(required=True, many=True)
     author = AuthorSerializer(required=False)
-    ingredients = IngredientSerializer(required=True, many=True)
+    ingredients = IngredientSerializer(
+        required=True, many=True, write_only=True
+    )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -111,6 +114,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         """Избранные рецепты"""
+        if hasattr(obj, 'is_favorited'):  # annotated in RecipeViewSet
+            return obj.is_favorited
         cur_user = self.context.get('request').user
         if cur_user.is_anonymous:
             return False
@@ -120,6 +125,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Список рецептов для покупки"""
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         cur_user = self.context.get('request').user
         if cur_user.is_anonymous:
             return False
@@ -134,19 +141,18 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = data.get('tags')
         if tags is None:
             return super().to_internal_value(data)
-        tag_list = []
-        if tags == []:
-            tags = ['empty']
-        for tag in tags:
-            tags = TagSerializer(Tag, data=tag)
-            tags.is_valid(raise_exception=True)
-            tag_list.append(tags.validated_data)
-        data['tags'] = tag_list
+        data['tags'] = validate_tags(tags, tag_reference)
         return super().to_internal_value(data)
 
     def to_representation(self, instance):
-        self.context['instance'] = instance  # for Ingr. ser-zer amount field
-        return super().to_representation(instance)
+        if 'ingreds' not in getattr(instance, '_prefetched_objects_cache', {}):
+            # created or updated recipe, lists are prefetched in the view
+            prefetch_related_objects([instance], *RECIPE_PREFETCH)
+        response = super().to_representation(instance)
+        response['ingredients'] = RecipeIngredientSerializer(
+            instance.ingreds.all(), many=True
+        ).data
+        return response
 
     def validate_name(self, value):
         if self.context.get('request').method == 'PATCH':
@@ -156,41 +162,101 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def validate_ingredients(self, value):
         """Responsible for internal part of ingredients"""
-        return validate_ingredients(value)
-
-    def create(self, validated_data):
-        author = self.context.get('request').user
-        tags = self.initial_data.get('tags', [])
-        ingredients = self.initial_data.get('ingredients', [])
-        validated_data['author'] = author
-        validated_data.pop('tags')
-        validated_data.pop('ingredients')
-        recipe = Recipe(**validated_data)
-        recipetag_list = []
-        tag_set = set()
-        for tag in tags:
-            tag_id = tag.get('id')
-            is_unique(tag_id, tag_set, 'tags')
-            tag = Tag.objects.get(id=tag_id)
-            recipetag_list.append(RecipeTag(recipe=recipe, tag=tag))
-        recipeingredient_list = []
+        value = validate_ingredients(value)
         ing_set = set()
-        for ingredient in ingredients:
-            ing_id = ingredient.get('id')
-            is_unique(ing_id, ing_set, 'ingredients')
-            ing_inst = Ingredient.objects.get(id=ing_id)
-            amount = ingredient.get('amount')
-            recipeingredient_list.append(
-                RecipeIngredient(
-                    recipe=recipe, ingredient=ing_inst, amount=amount
-                )
+        for ingredient in value:
+            # "1" and "01" are the same ingredient
+            ingredient['id'] = validate_ingredient_id(ingredient['id'])
+            is_unique(ingredient['id'], ing_set, 'ingredients')
+        validate_ingredient_ids(ing_set, ingredient_reference)
+        return value
+
+    @staticmethod
+    def create_relations(recipe, tags, ingredients):
+        """Ids are already checked in validation, so no lookups here"""
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=tag['id']) for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount'],
             )
-        recipe.save()
-        RecipeTag.objects.bulk_create(recipetag_list)
-        RecipeIngredient.objects.bulk_create(recipeingredient_list)
+            for ingredient in ingredients
+        )
+
+    @staticmethod
+    def update_tags(recipe, tags):
+        """Deletes and inserts only changed RecipeTag rows"""
+        existing = set(
+            RecipeTag.objects.filter(recipe=recipe).values_list(
+                'tag_id', flat=True
+            )
+        )
+        new = {tag['id'] for tag in tags}
+        if existing - new:
+            RecipeTag.objects.filter(
+                recipe=recipe, tag_id__in=existing - new
+            ).delete()
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag_id=tag_id)
+            for tag_id in new - existing
+        )
+
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """Deletes, updates and inserts only changed RecipeIngredient rows"""
+        existing = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            )
+        }
+        new = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = existing.keys() - new.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, recipe_ingredient in existing.items():
+            amount = new.get(ingredient_id)
+            if amount is not None and amount != recipe_ingredient.amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in new.items()
+            if ingredient_id not in existing
+        )
+
+    @staticmethod
+    def process_image(recipe):
+        """Renditions are made by run_worker, or right away if not async"""
+        enqueue(create_recipe_renditions, recipe.id)
+        recipe.refresh_from_db(fields=('renditions',))
+
+    @transaction.atomic
+    def create(self, validated_data):
+        tags = validated_data.pop('tags')
+        ingredients = validated_data.pop('ingredients')
+        validated_data['author'] = self.context.get('request').user
+        recipe = Recipe.objects.create(**validated_data)
+        self.create_relations(recipe, tags, ingredients)
+        transaction.on_commit(lambda: self.process_image(recipe))
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        """Relations missing in PATCH stay untouched"""
         tags = validated_data.get('tags')
         ingredients = validated_data.get('ingredients')
         instance.name = validated_data.get('name', instance.name)
@@ -199,27 +265,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         instance.cooking_time = validated_data.get(
             'cooking_time', instance.cooking_time
         )
-        RecipeTag.objects.filter(recipe_id=instance.id).delete()
-        recipetag_list = []
-        tag_set = set()
-        for tag in tags:
-            tag = Tag.objects.filter(**tag)[0]
-            is_unique(tag.id, tag_set, 'tags')
-            recipetag_list.append(RecipeTag(recipe=instance, tag=tag))
-        RecipeIngredient.objects.filter(recipe_id=instance.id).delete()
-        recipeingredient_list = []
-        ing_set = set()
-        for ingredient in ingredients:
-            ing_id = ingredient.get('id')
-            is_unique(ing_id, ing_set, 'ingredients')
-            ing_inst = Ingredient.objects.get(id=ing_id)
-            amount = ingredient.get('amount')
-            recipeingredient_list.append(
-                RecipeIngredient(
-                    recipe=instance, ingredient=ing_inst, amount=amount
-                )
-            )
         instance.save()
-        RecipeTag.objects.bulk_create(recipetag_list)
-        RecipeIngredient.objects.bulk_create(recipeingredient_list)
+        if tags is not None:
+            self.update_tags(instance, tags)
+        if ingredients is not None:
+            self.update_ingredients(instance, ingredients)
+        if 'image' in validated_data:
+            transaction.on_commit(lambda: self.process_image(instance))
         return instance
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.v1.caching import bump_generation
+from api.v1.reference import ingredient_reference, tag_reference
+from jobs.services import enqueue
+from recipe.models import (
+    Cart,
+    Favorites,
+    Ingredient,
+    Product,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag,
+    Unit,
+)
+from recipe.tasks import drop_recipe_from_feeds, push_recipe_to_feeds
+from users.models import User
+
+
+def change_counter(model, pk, field, delta):
+    """
+    F() update, runs in the transaction of the write that caused it.
+    Never goes below 0: rows older than the counters were not counted
+    until manage.py recount (run on deploy)
+    """
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def touch_recipe(sender, instance, **kwargs):
+    """Ingredients changed, so cached shopping lists must be rebuilt"""
+    Recipe.objects.filter(id=instance.recipe_id).update(
+        updated=timezone.now()
+    )
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def reset_tag_reference(sender, **kwargs):
+    # after commit, or other workers may reload the old rows
+    transaction.on_commit(tag_reference.bump)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Product)
+@receiver((post_save, post_delete), sender=Unit)
+def reset_ingredient_reference(sender, **kwargs):
+    transaction.on_commit(ingredient_reference.bump)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeTag)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Product)
+@receiver((post_save, post_delete), sender=Unit)
+@receiver((post_save, post_delete), sender=User)
+def reset_response_cache(sender, update_fields=None, **kwargs):
+    """Anonymous responses may show any of these, see AnonymousCacheMixin"""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=Favorites)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorites)
+def decrement_favorites_count(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Cart)
+def increment_in_carts_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'in_carts_count', 1)
+
+
+@receiver(post_delete, sender=Cart)
+def decrement_in_carts_count(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'in_carts_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def push_to_feeds(sender, instance, created, **kwargs):
+    """Precomputed feeds of followers, see api.v1.feed"""
+    if created:
+        transaction.on_commit(
+            lambda: enqueue(push_recipe_to_feeds, instance.id)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def drop_from_feeds(sender, instance, **kwargs):
+    author_id, recipe_id = instance.author_id, instance.id
+    transaction.on_commit(
+        lambda: enqueue(drop_recipe_from_feeds, author_id, recipe_id)
+    )
@@ -0,0 +1,43 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from api.v1.feed import add_to_feeds, remove_from_feeds
+from api.v1.services import create_pdf, get_ingredients
+from jobs.registry import task
+from recipe.images import create_renditions
+from recipe.models import Recipe
+from users.models import User
+
+
+@task
+def create_recipe_renditions(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return None
+    create_renditions(recipe)
+    return recipe.renditions
+
+
+@task
+def render_shopping_list(user_id, cart_hash):
+    """
+    Pdf is saved to storage, same cart contents give the same file.
+    Per user: purging one user's job must not delete another's file
+    """
+    name = f'shopping_lists/{user_id}/{cart_hash}.pdf'
+    if not default_storage.exists(name):
+        document = create_pdf(get_ingredients(User(id=user_id)))
+        name = default_storage.save(name, ContentFile(document.getvalue()))
+    return {'file': name}
+
+
+@task
+def push_recipe_to_feeds(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is not None:
+        add_to_feeds(recipe)
+
+
+@task
+def drop_recipe_from_feeds(author_id, recipe_id):
+    remove_from_feeds(author_id, recipe_id)
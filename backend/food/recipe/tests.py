@@ -0,0 +1,235 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.v1.filters import RecipeFilter
+from api.v1.reference import ingredient_reference, tag_reference
+from api.v1.services import get_cart_hash
+from jobs.models import Job
+from jobs.services import enqueue, purge_finished
+from recipe.models import (
+    Cart,
+    Ingredient,
+    Product,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag,
+    Unit,
+)
+from recipe.tasks import render_shopping_list
+from users.models import Follow, User
+
+
+class RecipeFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author',
+            email='author@example.org',
+            password='Qwerty123',
+            first_name='Автор',
+            last_name='Рецептов',
+        )
+        cls.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.org',
+            password='Qwerty123',
+            first_name='Читатель',
+            last_name='Рецептов',
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {i}', color=f'#00000{i}', slug=f'tag{i}'
+            )
+            for i in range(2)
+        ]
+        unit = Unit.objects.create(name='г')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                product=Product.objects.create(name=f'Продукт {i}'),
+                measurement_unit=unit,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        tag_reference.snapshot = ingredient_reference.snapshot = None
+
+    @classmethod
+    def create_recipes(cls, count):
+        for _ in range(count):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {Recipe.objects.count()}',
+                text='Описание',
+                cooking_time=10,
+                image='images/recipe.jpg',
+            )
+            for tag in cls.tags:
+                RecipeTag.objects.create(recipe=recipe, tag=tag)
+            for amount, ingredient in enumerate(cls.ingredients, 1):
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+
+
+class RecipeListQueriesTest(RecipeFixtureMixin, TestCase):
+    """Recipe page costs the same number of queries for any page size"""
+
+    url = '/api/v1/recipes/?limit=10'
+
+    def assert_page_queries(self, client, queries):
+        for count in (1, 6):
+            Recipe.objects.all().delete()
+            self.create_recipes(count)
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), count)
+
+    def test_anonymous(self):
+        # recipes, tags, ingredients; last page needs no count
+        self.assert_page_queries(APIClient(), 3)
+
+    def test_authenticated(self):
+        # recipes with is_favorited/is_in_shopping_cart,
+        # tags, ingredients, followed authors
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_page_queries(client, 4)
+
+
+class RecipeIndexesTest(RecipeFixtureMixin, TestCase):
+    """Planner uses the indexes declared for the hot recipe queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.create_recipes(20)
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # tables are tiny in tests, seq scan would always win
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def filtered(self, data):
+        return RecipeFilter(data, queryset=Recipe.objects.all()).qs
+
+    def test_list_ordering(self):
+        self.assertIn(
+            'recipe_pub_date_id_idx',
+            self.explain(Recipe.objects.all()[:10]),
+        )
+
+    def test_author_filter(self):
+        self.assertIn(
+            'recipe_author_pub_date_idx',
+            self.explain(self.filtered({'author': self.author.id})[:10]),
+        )
+
+    def test_tags_filter(self):
+        self.assertIn(
+            'recipetag_tag_recipe_idx',
+            self.explain(self.filtered({'tags': ['tag0']})[:10]),
+        )
+
+
+class RecipeListCountTest(RecipeFixtureMixin, TestCase):
+    """Cached or estimated count never hides rows of the page"""
+
+    url = '/api/v1/recipes/?limit=10'
+
+    def test_stale_count(self):
+        client = APIClient()
+        self.create_recipes(2)
+        self.assertEqual(client.get(self.url).data['count'], 2)
+        self.create_recipes(1)
+        response = client.get(self.url)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_stale_count_next_page(self):
+        client = APIClient()
+        self.create_recipes(2)
+        client.get('/api/v1/recipes/?limit=1')
+        self.create_recipes(2)
+        response = client.get('/api/v1/recipes/?limit=1&page=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['next'])
+        self.assertGreaterEqual(response.data['count'], 4)
+
+    def test_favorited_count(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.create_recipes(1)
+        url = f'{self.url}&is_favorited=1'
+        self.assertEqual(client.get(url).data['count'], 0)
+        recipe = Recipe.objects.get()
+        client.post(f'/api/v1/recipes/{recipe.id}/favorite/')
+        response = client.get(url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@mock.patch('api.v1.feed.FEED_CACHE_MIN_FOLLOWING', 1)
+class CachedFeedTest(RecipeFixtureMixin, TestCase):
+    """Precomputed feed pages"""
+
+    url = '/api/v1/recipes/feed/?limit=2&cursor='
+
+    def test_deleted_recipe(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        self.create_recipes(5)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        first = client.get(self.url).data
+        # deleted after the feed was cached, entry is still there
+        Recipe.objects.filter(
+            id=Recipe.objects.order_by('-pub_date', '-id')[2].id
+        ).delete()
+        second = client.get(first['next']).data
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNotNone(second['next'])
+        third = client.get(second['next']).data
+        self.assertEqual(len(third['results']), 1)
+        self.assertIsNone(third['next'])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ShoppingListFileTest(RecipeFixtureMixin, TestCase):
+    """Rendered shopping lists of different users never share a file"""
+
+    def render(self, user):
+        return enqueue(
+            render_shopping_list,
+            user.id,
+            get_cart_hash(user),
+            user=user,
+            key=f'shopping_list:{user.id}:{get_cart_hash(user)}',
+        )
+
+    def test_purge_keeps_other_users_file(self):
+        self.create_recipes(1)
+        recipe = Recipe.objects.get()
+        for user in (self.author, self.user):
+            Cart.objects.create(user=user, recipe=recipe)
+        old = self.render(self.author)
+        Job.objects.filter(id=old.id).update(
+            finished=timezone.now() - timedelta(days=2)
+        )
+        new = self.render(self.user)
+        self.assertEqual(purge_finished(timedelta(days=1)), 1)
+        new.refresh_from_db()
+        self.assertTrue(default_storage.exists(new.result['file']))
@@ -7,11 +7,25 @@ def validate_time(value):
         raise ValidationError('Время приготовления не может быть меньше 1')
 
 
-def validate_ingredient_id(value, ingredient):
-    if not ingredient.objects.filter(id=value).exists():
+def validate_ingredient_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(
+            f'id ингредиента должен быть целым числом. Введено: {value}'
+        )
+
+
+def validate_ingredient_ids(values, reference):
+    """Ids are looked up in the ingredient snapshot, not in the DB"""
+    ingredient_ids = {validate_ingredient_id(value) for value in values}
+    ingredients = reference.lookup(ingredient_ids)
+    missing = sorted(ingredient_ids - ingredients.keys())
+    if missing:
         raise serializers.ValidationError(
-            f'Не существует ингредиент с таким id: {value}'
+            f'Не существуют ингредиенты с id: {", ".join(map(str, missing))}'
         )
+    return ingredients
 
 
 def validate_recipes_limit(value):
@@ -28,24 +42,34 @@ def validate_recipes_limit(value):
     return int(value)
 
 
-def validate_tags(value, tag):
-    if value == 'empty':
+def validate_tags(values, reference):
+    """
+    Ids are looked up in the tag snapshot, all missing ids are reported
+    at once. Returns serialized tags
+    """
+    if not values:
         raise serializers.ValidationError(
             {'tags': 'Содержимое поля "tags" не должно быть пустым!'}
         )
-    if not isinstance(value, int):
+    for value in values:
+        if not isinstance(value, int):
+            raise serializers.ValidationError(
+                {
+                    'tags': f'Значения в поле "tags" должны иметь тип int. Введено: {type(value).__name__}'
+                }
+            )
+    tag_set = set(values)
+    if len(tag_set) != len(values):
         raise serializers.ValidationError(
-            {
-                'tags': f'Значения в поле "tags" должны иметь тип int. Введено: {type(value).__name__}'
-            }
+            {'tags': 'Элементы в поле "tags" не должны повторяться'}
         )
-    try:
-        cur_tag = tag.objects.get(id=value)
-    except tag.DoesNotExist:
+    tags = reference.lookup(tag_set)
+    missing = sorted(tag_set - tags.keys())
+    if missing:
         raise serializers.ValidationError(
-            {'tags': f'Тег с id {value} не существует'}
+            {'tags': f'Теги с id {", ".join(map(str, missing))} не существуют'}
         )
-    return cur_tag
+    return [tags[value] for value in values]
 
 
 def is_unique(el_id, el_set, field):
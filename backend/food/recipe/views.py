@@ -1,7 +1,11 @@
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import (
     serializers,
@@ -9,16 +13,39 @@ from rest_framework import (
     viewsets,
 )
 
+from api.v1.caching import AnonymousCacheMixin
+from api.v1.counting import EstimatedCount, ExactCount
+from api.v1.custom_pagination import (
+    KeysetPagination,
+    PageLimitCursorPagination,
+)
+from api.v1.feed import followed_recipes, get_cached_page
 from api.v1.filters import RecipeFilter, CustomSearchFilter
-from api.v1.services import create_pdf, get_ingredients
+from api.v1.services import get_cart_hash, get_shopping_list
 from api.v1.permissions import AuthorAdminPermission
+from api.v1.reference import (
+    ingredient_reference,
+    snapshot_response,
+    tag_reference,
+)
+from api.v1.renderers import SHOPPING_LIST_RENDERERS, ShoppingListRenderer
+from jobs.serializers import JobSerializer
+from jobs.services import enqueue
 from recipe.serializers import (
+    RECIPE_PREFETCH,
     IngredientSerializer,
     RecipeSerializer,
     RecipeSubscribeSerializer,
     TagSerializer,
 )
-from recipe.models import Cart, Favorites, Ingredient, Recipe, Tag
+from recipe.models import (
+    Cart,
+    Favorites,
+    Ingredient,
+    Recipe,
+    Tag,
+)
+from recipe.tasks import render_shopping_list
 from recipe.validators import (
     check_if_not_favorited,
     check_if_owner,
@@ -29,33 +56,101 @@ from recipe.validators import (
 )
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(AnonymousCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.select_related('product', 'measurement_unit')
     serializer_class = IngredientSerializer
     pagination_class = None
     filter_backends = (CustomSearchFilter,)
     search_fields = ('^product__name',)
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self.search, request, *args, **kwargs)
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    def search(self, request, *args, **kwargs):
+        """Prefix search over in-memory snapshot instead of the database"""
+        snapshot = ingredient_reference.get()
+        name = request.query_params.get(CustomSearchFilter.search_param, '')
+        if not name:
+            return snapshot_response(request, snapshot)
+        return Response(snapshot.index.search(name))
+
+
+class TagViewSet(AnonymousCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            self.serve_snapshot, request, *args, **kwargs
+        )
+
+    def serve_snapshot(self, request, *args, **kwargs):
+        return snapshot_response(request, tag_reference.get())
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.select_related('author')
+
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
+    queryset = Recipe.objects.select_related('author').prefetch_related(
+        *RECIPE_PREFETCH
+    )
     http_method_names = ('get', 'post', 'patch', 'delete')
     serializer_class = RecipeSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (AuthorAdminPermission,)
+    pagination_class = PageLimitCursorPagination
+    cursor_fields = ('pub_date', 'id')
+    count_strategy = EstimatedCount()
+    # favorites and cart writes do not invalidate cached counts
+    per_user_filters = ('is_favorited', 'is_in_shopping_cart')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'retrieve':
+            context['rendition'] = 'detail'
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Shopping list errors are json, not a file"""
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if response.status_code >= 400 and isinstance(
+            getattr(response, 'accepted_renderer', None), ShoppingListRenderer
+        ):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
+
+    def paginate_queryset(self, queryset):
+        params = self.request.query_params
+        if any(name in params for name in self.per_user_filters):
+            self.count_strategy = ExactCount()
+        return super().paginate_queryset(queryset)
+
+    def get_queryset(self):
+        """Annotates is_favorited and is_in_shopping_cart for whole page"""
+        queryset = super().get_queryset()
+        cur_user = self.request.user
+        if cur_user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False), is_in_shopping_cart=Value(False)
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorites.objects.filter(user=cur_user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                Cart.objects.filter(user=cur_user, recipe=OuterRef('pk'))
+            ),
+        )
 
     @action(
         detail=True,
         url_path=r'favorite',
         methods=('post', 'delete'),
     )
+    @transaction.atomic  # together with favorites_count update
     def subscription(self, request, pk):
         recipe = check_recipe_id(pk, Recipe)
         cur_user = request.user
@@ -70,25 +165,83 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer = RecipeSubscribeSerializer(instance=recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(
+        methods=('get',),
+        detail=False,
+        url_path=r'feed',
+        permission_classes=(IsAuthenticated,),
+        pagination_class=KeysetPagination,
+    )
+    def feed(self, request):
+        """Recipes of followed authors as one stream, newest first"""
+        paginator = self.paginator
+        queryset = self.get_queryset()
+        cached = get_cached_page(
+            request.user,
+            paginator.decode_cursor(request),
+            paginator.get_page_size(request),
+        )
+        if cached is None:
+            # recipes of followed authors are merged by the database
+            page = self.paginate_queryset(
+                followed_recipes(queryset, request.user)
+            )
+        else:
+            ids, next_position = cached
+            page = paginator.paginate_known_page(
+                queryset.filter(id__in=ids), request, self, next_position
+            )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         methods=('get',),
         detail=False,
         url_path=r'download_shopping_cart',
         permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_LIST_RENDERERS,
     )
-    def download_file(self, *args, **kwargs):
-        cur_user = self.request.user
-        recipes_id = cur_user.cart.all().values_list('recipe_id', flat=True)
-        if not recipes_id:
+    def download_file(self, request, *args, **kwargs):
+        """
+        Shopping list as ?format=pdf (default), txt, csv or json.
+        With ?async=1 pdf is rendered in background, response is the job
+        """
+        cur_user = request.user
+        cart_hash = get_cart_hash(cur_user)
+        if cart_hash is None:
             raise serializers.ValidationError('У вас нет рецептов в корзине!')
-        ingredients = get_ingredients(recipes_id)
-        file_path, file_name = create_pdf(ingredients)
-        document = open(file_path, 'rb')
-        response = HttpResponse(document, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename={file_name}'
+        renderer = request.accepted_renderer
+        if renderer.format == 'pdf' and request.query_params.get('async'):
+            job = enqueue(
+                render_shopping_list,
+                cur_user.id,
+                cart_hash,
+                user=cur_user,
+                key=f'shopping_list:{cur_user.id}:{cart_hash}',
+            )
+            return JsonResponse(
+                JobSerializer(job, context={'request': request}).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+        etag = f'"{cart_hash}-{renderer.format}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = StreamingHttpResponse(
+                get_shopping_list(cur_user, cart_hash, renderer.format),
+                content_type=content_type,
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename=shopping_list.{renderer.format}'
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
         return response
 
     @action(methods=('post', 'delete'), detail=True, url_path=r'shopping_cart')
+    @transaction.atomic  # together with in_carts_count update
     def change_cart(self, request, pk):
         recipe = check_recipe_id(pk, Recipe)
         cur_user = request.user
@@ -12,6 +12,8 @@ class UserAdmin(admin.ModelAdmin):
         'email',
         'password',
         'role',
+        'recipes_count',
+        'followers_count',
     )
     list_filter = (
         'first_name',
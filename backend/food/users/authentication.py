@@ -0,0 +1,117 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from food.settings import (
+    AUTH_TOKEN_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TIMEOUT,
+    AUTH_TOKEN_SHARED_CACHE_TIMEOUT,
+)
+from users.models import User
+
+# the only user fields cached: no password hash, permissions and
+# serializers read these, anything else is loaded on access.
+# Model field order, as Model.from_db expects
+USER_SNAPSHOT_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in {
+        'id',
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'role',
+        'is_active',
+        'is_staff',
+        'is_superuser',
+    }
+)
+
+
+class TokenCache:
+    """
+    Token key -> user snapshot (values of USER_SNAPSHOT_FIELDS).
+    Bounded LRU with TTL per process,
+    optionally backed by the shared Django cache. Local entries of other
+    workers are not dropped on invalidation, so their TTL is short.
+    The shared layer is off with locmem (AUTH_TOKEN_SHARED_CACHE_TIMEOUT):
+    there it would be one more per-process cache with a long TTL
+    """
+
+    def __init__(self, size, timeout, shared_timeout):
+        self.size = size
+        self.timeout = timeout
+        self.shared_timeout = shared_timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def shared_key(key):
+        return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.entries.move_to_end(key)
+                return entry[0]
+            self.entries.pop(key, None)
+        if not self.shared_timeout:
+            return None
+        values = cache.get(self.shared_key(key))
+        if values is not None:
+            self.set_local(key, values)
+        return values
+
+    def set(self, key, values):
+        self.set_local(key, values)
+        if self.shared_timeout:
+            cache.set(self.shared_key(key), values, self.shared_timeout)
+
+    def set_local(self, key, values):
+        with self.lock:
+            self.entries[key] = (values, time.monotonic() + self.timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+        if self.shared_timeout:
+            cache.delete(self.shared_key(key))
+
+
+token_cache = TokenCache(
+    AUTH_TOKEN_CACHE_SIZE,
+    AUTH_TOKEN_CACHE_TIMEOUT,
+    AUTH_TOKEN_SHARED_CACHE_TIMEOUT,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication without the Token + User query on every request.
+    Cache is dropped on logout, password change and deactivation
+    (see users.signals)
+    """
+
+    def authenticate_credentials(self, key):
+        values = token_cache.get(key)
+        if values is None:
+            user, token = super().authenticate_credentials(key)
+            values = [getattr(user, field) for field in USER_SNAPSHOT_FIELDS]
+            token_cache.set(key, tuple(values))
+            return user, token
+        # other fields are deferred, so user.save() writes only loaded ones
+        user = User.from_db(
+            router.db_for_read(User), USER_SNAPSHOT_FIELDS, values
+        )
+        return user, Token(key=key, user=user)
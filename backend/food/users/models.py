@@ -40,6 +40,13 @@ class User(AbstractUser):
         default=USER,
         verbose_name="Роль",
     )
+    # kept up to date by signals, repaired by manage.py recount
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('id',)
@@ -84,6 +91,11 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='follow_user_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_subscription'
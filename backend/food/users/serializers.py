@@ -1,24 +1,42 @@
+from django.db.models import F, Prefetch, Window, prefetch_related_objects
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from djoser.serializers import (
     UserCreateSerializer,
 )
 from rest_framework import serializers
 
+from recipe.fields import RenditionImageField
 from recipe.models import Recipe
 from recipe.validators import validate_recipes_limit
 from users.models import User, Follow
 
 
+def get_followed_ids(request):
+    """
+    Ids of authors followed by current user. Loaded once per request
+    and shared by every (nested) AuthorSerializer
+    """
+    if not hasattr(request, 'followed_ids'):
+        request.followed_ids = set(
+            Follow.objects.filter(user=request.user).values_list(
+                'author_id', flat=True
+            )
+        )
+    return request.followed_ids
+
+
 class AuthorSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     def get_is_subscribed(self, obj):
         """Существует ли подписка на этого автора"""
-        cur_user = self.context.get('request').user
-        if cur_user.is_anonymous:
+        if hasattr(obj, 'is_subscribed'):  # annotated by view
+            return obj.is_subscribed
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
             return False
-        if Follow.objects.filter(user=cur_user, author=obj).exists():
-            return True
-        return False
+        return obj.id in get_followed_ids(request)
 
     class Meta:
         model = User
@@ -53,32 +71,76 @@ class CustomUserSerializer(AuthorSerializer):
 
 class RecipeSubscribeSerializer(serializers.ModelSerializer):
     # Если перенести в рецепты будет ошибка сircular import
+    image = RenditionImageField(rendition='list', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
 
 
+def latest_recipes(authors, recipes_limit):
+    """
+    Recipes of given authors, at most recipes_limit latest per author.
+    Ranking is done by ROW_NUMBER() window in the same single query
+    """
+    ranked = (
+        Recipe.objects.filter(author__in=authors)
+        .annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        )
+        .order_by()
+        .values('id', 'row_number')
+    )
+    sql, params = ranked.query.sql_with_params()
+    return Recipe.objects.filter(
+        id__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            f'WHERE ranked.row_number <= %s',
+            (*params, recipes_limit),
+        )
+    ).order_by('-pub_date', '-id')
+
+
+def prefetch_recipes(authors, request):
+    """Loads recipes for all authors at once, honours ?recipes_limit="""
+    if not authors:  # empty IN () cannot be compiled into the raw query
+        return
+    recipes_limit = request.query_params.get('recipes_limit')
+    if recipes_limit:
+        recipes_limit = validate_recipes_limit(recipes_limit)
+        queryset = latest_recipes(authors, recipes_limit)
+    else:
+        queryset = Recipe.objects.order_by('-pub_date', '-id')
+    prefetch_related_objects(
+        authors,
+        Prefetch('recipes', queryset=queryset, to_attr='latest_recipes'),
+    )
+
+
+class SubscribeUserListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        authors = list(data)
+        prefetch_recipes(authors, self.context.get('request'))
+        return super().to_representation(authors)
+
+
 class SubscribeUserSerializer(AuthorSerializer):
-    recipes = RecipeSubscribeSerializer(many=True)
-    recipes_count = serializers.SerializerMethodField()
+    recipes = RecipeSubscribeSerializer(
+        many=True, read_only=True, source='latest_recipes'
+    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         new_fields = ('recipes', 'recipes_count')
         fields = AuthorSerializer.Meta.fields + new_fields
+        list_serializer_class = SubscribeUserListSerializer
 
     def to_representation(self, instance):
-        response = super().to_representation(instance)
-        query_params = self.context.get('request').query_params
-        recipes = response.get('recipes')
-        recipes_limit = query_params.get('recipes_limit')
-        if recipes_limit:
-            recipes_limit = validate_recipes_limit(recipes_limit)
-            if len(recipes) >= recipes_limit:
-                recipes = recipes[:recipes_limit]
-            response['recipes'] = recipes
-        return response
-
-    def get_recipes_count(self, obj):
-        user = obj
-        return user.recipes.count()
+        if not hasattr(instance, 'latest_recipes'):
+            prefetch_recipes([instance], self.context.get('request'))
+        return super().to_representation(instance)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.v1.feed import feed_key
+from recipe.signals import change_counter
+from users.authentication import token_cache
+from users.models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'followers_count', -1)
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def forget_feed(sender, instance, **kwargs):
+    """Followed authors changed, feed is rebuilt on the next read"""
+    key = feed_key(instance.user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """djoser logout deletes the token"""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """Password, is_active, role etc. changed: cached user is stale"""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        token_cache.delete(key)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipe.models import Recipe
+from users.models import Follow, User
+
+
+class SubscriptionsTest(TestCase):
+    url = '/api/v1/users/subscriptions/?page=1&limit=6&recipes_limit=3'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.org',
+            password='Qwerty123',
+            first_name='Читатель',
+            last_name='Рецептов',
+        )
+        cls.author = User.objects.create_user(
+            username='author',
+            email='author@example.org',
+            password='Qwerty123',
+            first_name='Автор',
+            last_name='Рецептов',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_no_subscriptions(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['results'], [])
+
+    def test_recipes_limit(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        for i in range(4):
+            Recipe.objects.create(
+                author=self.author,
+                name=f'Рецепт {i}',
+                text='Описание',
+                cooking_time=10,
+                image='images/recipe.jpg',
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        (author,) = response.data['results']
+        self.assertEqual(len(author['recipes']), 3)
+        self.assertEqual(author['recipes_count'], 4)
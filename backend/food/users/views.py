@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
 from djoser.views import UserViewSet, TokenCreateView
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -6,6 +8,8 @@ from rest_framework import (
     status,
 )
 
+from api.v1.counting import CachedCount, ExactCount
+from api.v1.custom_pagination import PageLimitCursorPagination
 from users.models import Follow, User
 from users.serializers import (
     CustomUserSerializer,
@@ -32,6 +36,8 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = PageLimitCursorPagination
+    count_strategy = CachedCount()
 
     @action(
         detail=False,
@@ -40,8 +46,13 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscription(self, request):
         user = self.request.user
-        subscriptions = user.following.all().values_list('author', flat=True)
-        queryset = self.queryset.filter(id__in=subscriptions)
+        queryset = self.queryset.filter(followers__user=user).annotate(
+            followed_at=F('followers__pub_date'),
+            is_subscribed=Value(True, output_field=BooleanField()),
+        )
+        self.cursor_fields = ('followed_at', 'id')  # for ?cursor= mode
+        # follows do not invalidate cached counts
+        self.count_strategy = ExactCount()
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = SubscribeUserSerializer(
@@ -54,6 +65,7 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=('post', 'delete'), url_path=r'subscribe')
+    @transaction.atomic  # together with followers_count update
     def subscribe(self, request, id):
         self.check_permissions(request)
         check_user(id, User)